@@ -1,19 +1,28 @@
 from __future__ import annotations
 
 
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import FrozenSet, List
 
 from pydantic import Field, HttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+_STORAGE_BACKEND_ALIASES = {
+    "loc_wisso": "local",
+    "filesystem": "local",
+}
+
 
 class Settings(BaseSettings):
     """Application configuration loaded from environment variables."""
 
     api_key: str = Field(..., alias="API_KEY")
     redis_url: str = Field("redis://localhost:6379/0", alias="REDIS_URL")
+    redis_max_connections: int = Field(64, alias="REDIS_MAX_CONNECTIONS")
+    redis_pool_timeout_seconds: int = Field(5, alias="REDIS_POOL_TIMEOUT_SECONDS")
+    redis_connect_timeout_seconds: float = Field(5.0, alias="REDIS_CONNECT_TIMEOUT_SECONDS")
     base_public_url: HttpUrl = Field("http://localhost:8000", alias="BASE_PUBLIC_URL")
     storage_backend: str = Field("local", alias="STORAGE_BACKEND")
     storage_local_root: Path = Field(Path("storage"), alias="STORAGE_LOCAL_ROOT")
@@ -40,11 +49,26 @@ class Settings(BaseSettings):
     @property
     def normalized_storage_backend(self) -> str:
         value = self.storage_backend.lower()
-        aliases = {
-            "loc_wisso": "local",
-            "filesystem": "local",
-        }
-        return aliases.get(value, value)
+        return _STORAGE_BACKEND_ALIASES.get(value, value)
+
+
+@dataclass(frozen=True, slots=True)
+class SettingsSnapshot:
+    """Plain, pre-resolved copy of the settings read by request handlers."""
+
+    api_key: str
+    base_url_prefix: str
+    allowed_domains: FrozenSet[str]
+    signed_url_ttl_seconds: int
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SettingsSnapshot":
+        return cls(
+            api_key=settings.api_key,
+            base_url_prefix=str(settings.base_public_url).rstrip("/"),
+            allowed_domains=frozenset(settings.allowed_domains),
+            signed_url_ttl_seconds=settings.signed_url_ttl_seconds,
+        )
 
 
 @lru_cache
@@ -52,6 +76,11 @@ def get_settings() -> Settings:
     return Settings()
 
 
+@lru_cache
+def get_resolved_settings() -> SettingsSnapshot:
+    return SettingsSnapshot.from_settings(get_settings())
+
+
 def get_storage_root(settings: Settings) -> Path:
     root = settings.storage_local_root
     return root if root.is_absolute() else Path.cwd() / root
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
@@ -9,17 +10,19 @@ from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
-from .config import Settings, get_settings
+from .config import Settings, SettingsSnapshot, get_resolved_settings
+from .events import PubSubDispatcher
 from .job_state import AsyncJobStateStore, JOB_TTL_SECONDS
 
 
 @asynccontextmanager
 async def redis_client(settings: Settings) -> AsyncIterator[Redis]:
-    client = Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+    """Standalone client for scripts and tests; request handlers use the shared app client."""
+    client = Redis.from_url(settings.redis_url)
     try:
         yield client
     finally:
-        await client.close()
+        await client.aclose()
 
 
 def rate_limit_key_func(request: Request) -> str:
@@ -28,7 +31,8 @@ def rate_limit_key_func(request: Request) -> str:
     token = "anonymous"
     if auth_header.lower().startswith("bearer "):
         token = auth_header.split(" ", 1)[1].strip()
-    return f"{client_host}:{token}"
+    # Hash so raw bearer tokens never end up in Redis keys.
+    return hashlib.blake2b(f"{client_host}:{token}".encode(), digest_size=8).hexdigest()
 
 
 def build_limiter(settings: Settings) -> Limiter:
@@ -37,11 +41,7 @@ def build_limiter(settings: Settings) -> Limiter:
     return limiter
 
 
-async def get_limiter(settings: Settings = Depends(get_settings)) -> Limiter:
-    return build_limiter(settings)
-
-
-def auth_dependency(request: Request, settings: Settings = Depends(get_settings)) -> None:
+def auth_dependency(request: Request, settings: SettingsSnapshot = Depends(get_resolved_settings)) -> None:
     header = request.headers.get("Authorization")
     if not header or not header.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
@@ -51,12 +51,17 @@ def auth_dependency(request: Request, settings: Settings = Depends(get_settings)
     request.state.authenticated_key = token
 
 
-async def get_async_redis(settings: Settings = Depends(get_settings)) -> AsyncIterator[Redis]:
-    async with redis_client(settings) as client:
-        yield client
+async def get_async_redis(request: Request) -> AsyncIterator[Redis]:
+    yield request.app.state.redis
+
+
+def get_event_dispatcher(request: Request) -> PubSubDispatcher:
+    return request.app.state.dispatcher
 
 
-def get_job_store(redis: Redis = Depends(get_async_redis), settings: Settings = Depends(get_settings)) -> AsyncJobStateStore:
+def get_job_store(
+    redis: Redis = Depends(get_async_redis), settings: SettingsSnapshot = Depends(get_resolved_settings)
+) -> AsyncJobStateStore:
     ttl = max(JOB_TTL_SECONDS, settings.signed_url_ttl_seconds * 8)
     return AsyncJobStateStore(redis, ttl_seconds=ttl)
 
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional, Set
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+
+async def _close_pubsub(pubsub: PubSub) -> None:
+    # aclose() releases the connection without an UNSUBSCRIBE round-trip, which
+    # on a connection the reader just tore down would only reconnect and
+    # re-subscribe first. It runs inside asyncio.shield, so a dropped
+    # connection must not surface as an unretrieved task exception.
+    with suppress(RedisConnectionError, ConnectionError):
+        await pubsub.aclose()
+
+
+async def _stop_reader(subscription: ChannelSubscription) -> None:
+    reader = subscription.reader
+    if reader is None:
+        return
+    reader.cancel()
+    # Wait for the reader to leave listen() before its connection is closed.
+    await asyncio.gather(reader, return_exceptions=True)
+
+
+@dataclass
+class ChannelSubscription:
+    pubsub: PubSub
+    queues: Set[asyncio.Queue] = field(default_factory=set)
+    reader: Optional[asyncio.Task] = None
+    # Set once SUBSCRIBE has either succeeded or failed; joiners wait on it.
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class PubSubDispatcher:
+    """Subscribes to each Redis channel once and fans messages out to local queues.
+
+    Every SSE client watching the same job shares one pub/sub connection. A
+    ``None`` item on a queue means the underlying subscription has ended.
+    Bookkeeping on ``channels`` never awaits, so it needs no lock; only the
+    clients of a channel whose SUBSCRIBE is still in flight wait for it.
+    """
+
+    def __init__(self, client: Redis):
+        self.client = client
+        self.channels: Dict[str, ChannelSubscription] = {}
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue()
+        subscription = await self._add(channel, queue)
+        try:
+            yield queue
+        finally:
+            await asyncio.shield(self._remove(channel, subscription, queue))
+
+    async def close(self) -> None:
+        channels = dict(self.channels)
+        self.channels.clear()
+        for subscription in channels.values():
+            subscription.ready.set()
+            await _stop_reader(subscription)
+            await _close_pubsub(subscription.pubsub)
+
+    async def _add(self, channel: str, queue: asyncio.Queue) -> ChannelSubscription:
+        while True:
+            subscription = self.channels.get(channel)
+            if subscription is None:
+                break
+            if subscription.ready.is_set():
+                subscription.queues.add(queue)
+                return subscription
+            # Another client is subscribing to this channel; wait without holding
+            # a queue slot, then look again in case that subscribe failed.
+            await subscription.ready.wait()
+
+        subscription = ChannelSubscription(pubsub=self.client.pubsub(ignore_subscribe_messages=True))
+        self.channels[channel] = subscription
+        try:
+            await subscription.pubsub.subscribe(channel)
+        except BaseException:
+            if self.channels.get(channel) is subscription:
+                del self.channels[channel]
+            subscription.ready.set()
+            # subscribe() checks out a pooled connection before it can fail;
+            # hand it back or the slot is lost for the life of the pool.
+            await asyncio.shield(_close_pubsub(subscription.pubsub))
+            raise
+        subscription.reader = asyncio.create_task(self._read(channel, subscription))
+        subscription.queues.add(queue)
+        subscription.ready.set()
+        return subscription
+
+    async def _remove(self, channel: str, subscription: ChannelSubscription, queue: asyncio.Queue) -> None:
+        subscription.queues.discard(queue)
+        if subscription.queues:
+            return
+        if self.channels.get(channel) is subscription:
+            del self.channels[channel]
+        await _stop_reader(subscription)
+        await _close_pubsub(subscription.pubsub)
+
+    async def _read(self, channel: str, subscription: ChannelSubscription) -> None:
+        try:
+            async for message in subscription.pubsub.listen():
+                if message.get("type") == "message":
+                    # Decode once here rather than once per connected client.
+                    data = message["data"].decode()
+                    for queue in subscription.queues:
+                        queue.put_nowait(data)
+        finally:
+            # Stop handing this subscription to new clients and wake current ones.
+            if self.channels.get(channel) is subscription:
+                del self.channels[channel]
+            for queue in subscription.queues:
+                queue.put_nowait(None)
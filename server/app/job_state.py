@@ -1,20 +1,68 @@
 from __future__ import annotations
 
-import json
-import uuid
+import os
+import secrets
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, Optional
 
+import orjson
 from redis import Redis
 from redis.asyncio import Redis as AsyncRedis
 
 JOB_TTL_SECONDS = 60 * 60 * 24 * 7  # one week
+DOWNLOAD_TOKEN_BYTES = 12  # 96 random bits, 16 URL-safe characters
+
+_now_iso_cache: tuple[int, str] = (-1, "")
 
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # Timestamps have second precision, so format each second only once.
+    global _now_iso_cache
+    second = int(time.time())
+    cached_second, value = _now_iso_cache
+    if second != cached_second:
+        value = datetime.fromtimestamp(second, timezone.utc).isoformat()
+        _now_iso_cache = (second, value)
+    return value
+
+
+_JOB_ID_BYTES = 16
+_JOB_ID_BATCH = 256
+_job_id_entropy = b""
+_job_id_offset = 0
+_job_id_lock = threading.Lock()
+
+
+def _reset_job_id_entropy() -> None:
+    # Runs in forked children: drop the parent's buffer so ids are never reused,
+    # and replace the lock in case another thread held it at fork time.
+    global _job_id_entropy, _job_id_offset, _job_id_lock
+    _job_id_entropy = b""
+    _job_id_offset = 0
+    _job_id_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_job_id_entropy)
+
+
+def new_job_id() -> str:
+    """Return a random 32-character hex job id, reading os.urandom once per batch of ids."""
+    global _job_id_entropy, _job_id_offset
+    with _job_id_lock:
+        if _job_id_offset >= len(_job_id_entropy):
+            _job_id_entropy = os.urandom(_JOB_ID_BYTES * _JOB_ID_BATCH)
+            _job_id_offset = 0
+        start = _job_id_offset
+        _job_id_offset += _JOB_ID_BYTES
+        return _job_id_entropy[start:_job_id_offset].hex()
+
+
+def _decode(value: Optional[bytes]) -> Optional[str]:
+    return value.decode() if value is not None else None
 
 
 def job_key(job_id: str) -> str:
@@ -47,22 +95,22 @@ class JobState:
     updated_at: Optional[str] = None
 
     @classmethod
-    def from_redis(cls, job_id: str, payload: Dict[str, str]) -> "JobState | None":
+    def from_redis(cls, job_id: str, payload: Dict[bytes, bytes]) -> "JobState | None":
         if not payload:
             return None
-        result_raw = payload.get("result")
-        result = json.loads(result_raw) if result_raw else None
-        error = payload.get("error")
-        progress = float(payload.get("progress", "0"))
-        status = JobStatus(payload.get("status", JobStatus.QUEUED.value))
+        result_raw = payload.get(b"result")
+        result = orjson.loads(result_raw) if result_raw else None
+        error = _decode(payload.get(b"error"))
+        progress = float(payload.get(b"progress", b"0"))
+        status = JobStatus(_decode(payload.get(b"status")) or JobStatus.QUEUED.value)
         return cls(
             job_id=job_id,
             status=status,
             progress=progress,
             result=result,
             error=error,
-            created_at=payload.get("created_at"),
-            updated_at=payload.get("updated_at"),
+            created_at=_decode(payload.get(b"created_at")),
+            updated_at=_decode(payload.get(b"updated_at")),
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -80,10 +128,10 @@ class BaseJobStore:
         self.ttl_seconds = ttl_seconds
 
     @staticmethod
-    def _serialize_result(result: Optional[Dict[str, Any]]) -> Optional[str]:
+    def _serialize_result(result: Optional[Dict[str, Any]]) -> Optional[bytes]:
         if result is None:
             return None
-        return json.dumps(result)
+        return orjson.dumps(result)
 
     def _base_payload(
         self, status: JobStatus, progress: float = 0.0, *, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None
@@ -99,6 +147,14 @@ class BaseJobStore:
             data["error"] = error
         return data
 
+    @staticmethod
+    def _serialize_download_token(job_id: str, file_path: str, file_name: str | None, mime: str | None) -> bytes:
+        return orjson.dumps({"job_id": job_id, "file_path": file_path, "file_name": file_name, "mime": mime})
+
+    @staticmethod
+    def _serialize_event(event: Dict[str, Any]) -> bytes:
+        return orjson.dumps({"timestamp": _now_iso(), **event})
+
 
 class JobStateStore(BaseJobStore):
     """Synchronous Redis helper for Celery workers."""
@@ -107,52 +163,61 @@ class JobStateStore(BaseJobStore):
         super().__init__(ttl_seconds)
         self.client = client
 
+    def _write_state(self, key: str, data: Dict[str, Any]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, mapping=data)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
     def init_job(self, job_id: str, payload: Dict[str, Any]) -> None:
+        now = _now_iso()
         data = {
             "status": JobStatus.QUEUED.value,
             "progress": "0",
-            "created_at": _now_iso(),
-            "updated_at": _now_iso(),
-            "request": json.dumps(payload),
+            "created_at": now,
+            "updated_at": now,
+            "request": orjson.dumps(payload),
         }
         key = job_key(job_id)
-        self.client.hset(key, mapping=data)
-        self.client.expire(key, self.ttl_seconds)
+        self._write_state(key, data)
 
     def set_status(self, job_id: str, status: JobStatus, progress: float = 0.0) -> None:
         key = job_key(job_id)
         data = self._base_payload(status, progress)
-        self.client.hset(key, mapping=data)
-        self.client.expire(key, self.ttl_seconds)
+        self._write_state(key, data)
 
     def set_result(self, job_id: str, result: Dict[str, Any]) -> None:
         key = job_key(job_id)
         data = self._base_payload(JobStatus.SUCCEEDED, 100.0, result=result)
-        self.client.hset(key, mapping=data)
-        self.client.expire(key, self.ttl_seconds)
+        self._write_state(key, data)
 
     def set_error(self, job_id: str, message: str) -> None:
         key = job_key(job_id)
         data = self._base_payload(JobStatus.FAILED, error=message)
-        self.client.hset(key, mapping=data)
-        self.client.expire(key, self.ttl_seconds)
+        self._write_state(key, data)
 
     def publish_event(self, job_id: str, event: Dict[str, Any]) -> None:
         channel = job_events_channel(job_id)
-        payload = {
-            "timestamp": _now_iso(),
-            **event,
-        }
-        self.client.publish(channel, json.dumps(payload))
+        self.client.publish(channel, self._serialize_event(event))
+
+    def update_and_publish(self, job_id: str, status: JobStatus, progress: float, event: Dict[str, Any]) -> None:
+        """Write the status and publish ``event`` in a single round-trip."""
+        key = job_key(job_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, mapping=self._base_payload(status, progress))
+        pipe.expire(key, self.ttl_seconds)
+        pipe.publish(job_events_channel(job_id), self._serialize_event(event))
+        pipe.execute()
 
     def store_download_token(
         self, job_id: str, file_path: str, ttl_seconds: int, *, file_name: str | None = None, mime: str | None = None
     ) -> str:
-        token = uuid.uuid4().hex
-        key = download_token_key(token)
-        payload = json.dumps({"job_id": job_id, "file_path": file_path, "file_name": file_name, "mime": mime})
-        self.client.setex(key, ttl_seconds, payload)
-        return token
+        payload = self._serialize_download_token(job_id, file_path, file_name, mime)
+        while True:
+            token = secrets.token_urlsafe(DOWNLOAD_TOKEN_BYTES)
+            # NX guarantees a (vanishingly unlikely) collision never overwrites a live token.
+            if self.client.set(download_token_key(token), payload, ex=ttl_seconds, nx=True):
+                return token
 
 
 class AsyncJobStateStore(BaseJobStore):
@@ -162,17 +227,23 @@ class AsyncJobStateStore(BaseJobStore):
         super().__init__(ttl_seconds)
         self.client = client
 
+    async def _write_state(self, key: str, data: Dict[str, Any]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, mapping=data)
+        pipe.expire(key, self.ttl_seconds)
+        await pipe.execute()
+
     async def init_job(self, job_id: str, payload: Dict[str, Any]) -> None:
+        now = _now_iso()
         data = {
             "status": JobStatus.QUEUED.value,
             "progress": "0",
-            "created_at": _now_iso(),
-            "updated_at": _now_iso(),
-            "request": json.dumps(payload),
+            "created_at": now,
+            "updated_at": now,
+            "request": orjson.dumps(payload),
         }
         key = job_key(job_id)
-        await self.client.hset(key, mapping=data)
-        await self.client.expire(key, self.ttl_seconds)
+        await self._write_state(key, data)
 
     async def get_job(self, job_id: str) -> JobState | None:
         key = job_key(job_id)
@@ -182,13 +253,13 @@ class AsyncJobStateStore(BaseJobStore):
     async def store_download_token(
         self, job_id: str, file_path: str, ttl_seconds: int, *, file_name: str | None = None, mime: str | None = None
     ) -> str:
-        token = uuid.uuid4().hex
-        key = download_token_key(token)
-        payload = json.dumps({"job_id": job_id, "file_path": file_path, "file_name": file_name, "mime": mime})
-        await self.client.setex(key, ttl_seconds, payload)
-        return token
+        payload = self._serialize_download_token(job_id, file_path, file_name, mime)
+        while True:
+            token = secrets.token_urlsafe(DOWNLOAD_TOKEN_BYTES)
+            if await self.client.set(download_token_key(token), payload, ex=ttl_seconds, nx=True):
+                return token
 
-    async def pop_download_token(self, token: str) -> Optional[Dict[str, str]]:
+    async def pop_download_token(self, token: str) -> Optional[Dict[str, Any]]:
         key = download_token_key(token)
         pipe = self.client.pipeline()
         pipe.get(key)
@@ -197,7 +268,7 @@ class AsyncJobStateStore(BaseJobStore):
         raw_payload = result[0]
         if raw_payload is None:
             return None
-        return json.loads(raw_payload)
+        return orjson.loads(raw_payload)
 
     async def list_events(self, job_id: str, min_id: int = 0) -> list[Dict[str, Any]]:
         # Placeholder for future list-based retrieval; events stream via pub/sub.
@@ -1,41 +1,81 @@
 from __future__ import annotations
 
-import asyncio
-import json
-import mimetypes
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import AsyncIterator
-from urllib.parse import urlparse
-from uuid import uuid4
+from urllib.parse import urlsplit
 
+import orjson
 from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
 from fastapi.responses import FileResponse
 from sse_starlette.sse import EventSourceResponse
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
 from slowapi.errors import RateLimitExceeded
 
-from .config import Settings, get_settings
-from .dependencies import auth_dependency, build_limiter, get_job_store, rate_limit_handler
-from .job_state import AsyncJobStateStore, JobStatus, job_events_channel
+from .config import SettingsSnapshot, get_resolved_settings, get_settings
+from .dependencies import (
+    auth_dependency,
+    build_limiter,
+    get_async_redis,
+    get_event_dispatcher,
+    get_job_store,
+    rate_limit_handler,
+)
+from .events import PubSubDispatcher
+from .job_state import AsyncJobStateStore, JobStatus, job_events_channel, new_job_id
 from .schemas import DownloadUrlResponse, JobCreateRequest, JobCreateResponse, JobResult, JobStatusResponse
+from .storage import guess_mime_type
 from .tasks import download_media
 
 settings = get_settings()
+resolved_settings = get_resolved_settings()
 limiter = build_limiter(settings)
 LIMIT_VALUE = f"{settings.rate_limit_per_minute}/minute"
+# Starlette reads files in 64 KiB chunks by default; media downloads are large.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # A blocking pool makes requests wait for a free connection when the cap is
+    # reached instead of failing with "Too many connections".
+    pool = BlockingConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout_seconds,
+    )
+    redis = Redis(connection_pool=pool)
+    # Each watched job pins a pub/sub connection for as long as it has SSE
+    # clients, so subscriptions get their own uncapped pool and can never
+    # exhaust the one serving short-lived requests.
+    events_redis = Redis.from_url(settings.redis_url, socket_connect_timeout=settings.redis_connect_timeout_seconds)
+    dispatcher = PubSubDispatcher(events_redis)
+    app.state.redis = redis
+    app.state.dispatcher = dispatcher
+    try:
+        yield
+    finally:
+        await dispatcher.close()
+        await events_redis.aclose()
+        await redis.aclose()
+        await pool.disconnect()
 
-app = FastAPI(title="YTDLnis Backend", version="0.1.0")
+
+app = FastAPI(title="YTDLnis Backend", version="0.1.0", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
 
 
+_ALLOWED_SCHEMES = frozenset({"http", "https"})
+
 
-def _validate_url(url: str, settings: Settings) -> None:
-    parsed = urlparse(url)
-    if parsed.scheme not in {"http", "https"}:
+def _validate_url(url: str, settings: SettingsSnapshot) -> None:
+    parsed = urlsplit(url)
+    if parsed.scheme not in _ALLOWED_SCHEMES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only http(s) URLs are allowed")
     if settings.allowed_domains:
-        host = (parsed.hostname or "").lower()
+        # hostname is already lower-cased by urllib.
+        host = parsed.hostname or ""
         if host not in settings.allowed_domains:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="URL domain is not allowed")
 
@@ -49,15 +89,15 @@ async def create_job(
 ) -> JobCreateResponse:
     payload = request_model.model_dump(mode="json")
     payload["url"] = str(payload["url"])
-    _validate_url(payload["url"], settings)
+    _validate_url(payload["url"], resolved_settings)
 
-    job_id = uuid4().hex
+    job_id = new_job_id()
     sanitized = dict(payload)
     if sanitized.get("cookie"):
         sanitized["cookie"] = "***"
     await job_store.init_job(job_id, sanitized)
 
-    download_media.apply_async(args=(job_id, json.dumps(payload)), task_id=job_id)
+    download_media.apply_async(args=(job_id, orjson.dumps(payload).decode()), task_id=job_id)
     return JobCreateResponse(id=job_id, status=JobStatus.QUEUED)
 
 
@@ -76,13 +116,17 @@ async def get_job_status(
     if job.result:
         result_payload = dict(job.result)
         result_payload.pop("storage_path", None)
-        result_payload["download_url"] = f"{settings.base_public_url.rstrip('/')}/api/jobs/{job_id}/result"
+        result_payload["download_url"] = f"{resolved_settings.base_url_prefix}/api/jobs/{job_id}/result"
 
-    return JobStatusResponse(
+    # model_construct skips validation, and FastAPI passes model instances through
+    # response_model unchecked, so nothing here enforces the schema. The worker
+    # validates the result against JobResult before writing it, and JobState.from_redis
+    # already parses status and progress into their types.
+    return JobStatusResponse.model_construct(
         id=job.job_id,
         status=job.status,
         progress=job.progress,
-        result=JobResult(**result_payload) if result_payload else None,
+        result=JobResult.model_construct(**result_payload) if result_payload else None,
         error=job.error,
     )
 
@@ -107,36 +151,29 @@ async def get_job_result(
     token = await job_store.store_download_token(
         job_id,
         storage_path,
-        settings.signed_url_ttl_seconds,
+        resolved_settings.signed_url_ttl_seconds,
         file_name=job.result.get("file_name"),
         mime=job.result.get("mime"),
     )
-    download_url = f"{settings.base_public_url.rstrip('/')}/api/download/{token}"
-    return DownloadUrlResponse(url=download_url, expires_in=settings.signed_url_ttl_seconds)
+    download_url = f"{resolved_settings.base_url_prefix}/api/download/{token}"
+    return DownloadUrlResponse(url=download_url, expires_in=resolved_settings.signed_url_ttl_seconds)
 
 
-async def _event_stream(request: Request, redis: Redis, job_id: str) -> AsyncIterator[dict]:
-    channel = job_events_channel(job_id)
-    pubsub = redis.pubsub()
-    await pubsub.subscribe(channel)
-    store = AsyncJobStateStore(redis)
-
-    job = await store.get_job(job_id)
-    if job:
-        snapshot = job.to_dict()
-        yield {"event": "snapshot", "data": json.dumps(snapshot)}
+async def _event_stream(redis: Redis, dispatcher: PubSubDispatcher, job_id: str) -> AsyncIterator[dict]:
+    # EventSourceResponse watches for client disconnects and cancels this
+    # generator, so the loop can block on the queue without polling.
+    async with dispatcher.subscribe(job_events_channel(job_id)) as queue:
+        store = AsyncJobStateStore(redis)
+        job = await store.get_job(job_id)
+        if job:
+            snapshot = job.to_dict()
+            yield {"event": "snapshot", "data": orjson.dumps(snapshot).decode()}
 
-    try:
         while True:
-            if await request.is_disconnected():
+            data = await queue.get()
+            if data is None:
                 break
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message and message.get("type") == "message":
-                yield {"data": message["data"]}
-            await asyncio.sleep(0.25)
-    finally:
-        await pubsub.unsubscribe(channel)
-        await pubsub.close()
+            yield {"data": data}
 
 
 @app.get("/api/jobs/{job_id}/events")
@@ -144,43 +181,35 @@ async def _event_stream(request: Request, redis: Redis, job_id: str) -> AsyncIte
 async def stream_job_events(
     job_id: str,
     request: Request,
+    redis: Redis = Depends(get_async_redis),
+    dispatcher: PubSubDispatcher = Depends(get_event_dispatcher),
     _: None = Depends(auth_dependency),
-    settings: Settings = Depends(get_settings),
 ) -> EventSourceResponse:
-    redis = Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
-
-    async def generator() -> AsyncIterator[dict]:
-        try:
-            async for event in _event_stream(request, redis, job_id):
-                yield event
-        finally:
-            await redis.close()
-
-    return EventSourceResponse(generator())
+    return EventSourceResponse(_event_stream(redis, dispatcher, job_id))
 
 
 @app.get("/api/download/{token}")
 @limiter.limit(LIMIT_VALUE)
 async def download_file(
     token: str,
-    settings: Settings = Depends(get_settings),
+    redis: Redis = Depends(get_async_redis),
 ) -> FileResponse:
-    redis = Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
-    try:
-        store = AsyncJobStateStore(redis)
-        payload = await store.pop_download_token(token)
-    finally:
-        await redis.close()
+    store = AsyncJobStateStore(redis)
+    payload = await store.pop_download_token(token)
     if not payload:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Download link expired")
 
     path = Path(payload["file_path"])
-    if not path.exists():
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_410_GONE, detail="File is no longer available")
 
     filename = payload.get("file_name") or path.name
-    media_type = payload.get("mime") or mimetypes.guess_type(filename)[0] or "application/octet-stream"
-    return FileResponse(path, filename=filename, media_type=media_type)
+    media_type = payload.get("mime") or guess_mime_type(filename) or "application/octet-stream"
+    response = FileResponse(path, filename=filename, media_type=media_type, stat_result=stat_result)
+    response.chunk_size = DOWNLOAD_CHUNK_SIZE
+    return response
 
 
 @app.get("/api/health")
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
 
+import mimetypes
 import shutil
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from pathlib import Path
+from functools import lru_cache
+from pathlib import Path, PurePath
 from typing import Optional
 
 from .config import Settings, get_settings, get_storage_root
 
+# Load the system MIME tables at import instead of on the first lookup.
+mimetypes.init()
+
+
+@lru_cache(maxsize=256)
+def _mime_for_suffix(suffix: str) -> Optional[str]:
+    return mimetypes.guess_type(f"file{suffix}")[0]
+
+
+def guess_mime_type(file_name: str) -> Optional[str]:
+    """Guess a MIME type from the file extension, caching per extension."""
+    return _mime_for_suffix(PurePath(file_name).suffix.lower())
+
 
 @dataclass
 class StoredFile:
@@ -31,12 +46,23 @@ class StorageBackend(ABC):
     def open(self, stored: StoredFile):
         raise NotImplementedError
 
+    def staging_directory(self) -> Optional[Path]:
+        """Directory for in-progress downloads, or None for the system temp dir."""
+        return None
+
 
 class LocalStorageBackend(StorageBackend):
     def __init__(self, root: Path):
         self.root = root
         self.root.mkdir(parents=True, exist_ok=True)
 
+    def staging_directory(self) -> Optional[Path]:
+        # Staging under the storage root keeps store() a same-filesystem rename
+        # instead of a full copy of the media file.
+        staging = self.root / ".incoming"
+        staging.mkdir(parents=True, exist_ok=True)
+        return staging
+
     def _target_directory(self, job_id: str) -> Path:
         now = datetime.utcnow()
         subdir = Path(str(now.year), f"{now.month:02d}", f"{now.day:02d}", job_id)
@@ -1,23 +1,41 @@
 from __future__ import annotations
 
-import json
-import mimetypes
+import queue
 import shutil
 import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
+import orjson
 from celery import Celery
+from celery.signals import worker_ready
 from celery.utils.log import get_task_logger
 from redis import Redis
 from yt_dlp import YoutubeDL
 
 from .config import get_settings
 from .job_state import JobStateStore, JobStatus
-from .storage import StoredFile, get_storage_backend
+from .schemas import JobResult
+from .storage import StoredFile, get_storage_backend, guess_mime_type
 
 logger = get_task_logger(__name__)
 
+# Minimum spacing between progress writes; yt-dlp calls the hook for every chunk.
+PROGRESS_MIN_INTERVAL_SECONDS = 0.25
+PROGRESS_MIN_DELTA = 1.0
+
+# Staging dirs under the storage volume survive a killed worker, so the next worker
+# to start removes any that have not been written to for this long. The age check
+# spares downloads still running on other workers that share the volume.
+STAGING_DIR_PREFIX = "ytdlnis-"
+STALE_STAGING_SECONDS = 6 * 60 * 60
+
+# (progress, event) pairs handed from the yt-dlp hook to the publisher thread;
+# progress is None for events that do not update the job status.
+HookEvent = Tuple[Optional[float], Dict[str, object]]
+
 settings = get_settings()
 celery_app = Celery(
     "ytdlnis",
@@ -32,7 +50,32 @@ celery_app.conf.update(
 
 
 def _open_redis() -> Redis:
-    return Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+    return Redis.from_url(settings.redis_url)
+
+
+def _newest_mtime(path: Path) -> float:
+    newest = path.stat().st_mtime
+    for child in path.rglob("*"):
+        try:
+            newest = max(newest, child.stat().st_mtime)
+        except FileNotFoundError:
+            continue
+    return newest
+
+
+@worker_ready.connect
+def _sweep_stale_staging(**_: object) -> None:
+    staging = get_storage_backend(settings).staging_directory()
+    if staging is None:
+        return
+    cutoff = time.time() - STALE_STAGING_SECONDS
+    for entry in staging.glob(f"{STAGING_DIR_PREFIX}*"):
+        try:
+            if entry.is_dir() and _newest_mtime(entry) < cutoff:
+                logger.info("Removing stale staging directory %s", entry)
+                shutil.rmtree(entry, ignore_errors=True)
+        except FileNotFoundError:
+            continue
 
 
 def _normalize_progress(value: Optional[str]) -> float:
@@ -46,17 +89,18 @@ def _normalize_progress(value: Optional[str]) -> float:
 
 
 def _determine_mime(path: Path) -> Optional[str]:
-    mime, _ = mimetypes.guess_type(path.name)
-    return mime
+    return guess_mime_type(path.name)
 
 
-def _write_temp_cookie(temp_dir: Path, cookie_content: str) -> Path:
-    cookie_file = temp_dir / "cookies.txt"
+def _write_temp_cookie(cookie_dir: Path, cookie_content: str) -> Path:
+    cookie_file = cookie_dir / "cookies.txt"
     cookie_file.write_text(cookie_content, encoding="utf-8")
     return cookie_file
 
 
-def _build_ydl_options(temp_dir: Path, payload: Dict[str, Optional[str | Dict[str, str] | bool]]) -> Dict[str, object]:
+def _build_ydl_options(
+    temp_dir: Path, payload: Dict[str, Optional[str | Dict[str, str] | bool]], *, cookie_dir: Path
+) -> Dict[str, object]:
     outtmpl = payload.get("filename") or "%(title)s.%(ext)s"
     format_string = payload.get("format")
     prefer_audio = bool(payload.get("prefer_audio"))
@@ -84,54 +128,108 @@ def _build_ydl_options(temp_dir: Path, payload: Dict[str, Optional[str | Dict[st
 
     cookie = payload.get("cookie")
     if isinstance(cookie, str) and cookie:
-        cookie_file = _write_temp_cookie(temp_dir, cookie)
+        cookie_file = _write_temp_cookie(cookie_dir, cookie)
         options["cookiefile"] = str(cookie_file)
 
     return options
 
 
+def _publish_hook_events(events: queue.SimpleQueue[HookEvent | None], store: JobStateStore, job_id: str) -> None:
+    """Publish progress hook events off the download thread until a None sentinel arrives."""
+    while True:
+        batch = [events.get()]
+        while True:
+            try:
+                batch.append(events.get_nowait())
+            except queue.Empty:
+                break
+        for index, item in enumerate(batch):
+            if item is None:
+                return
+            progress, event = item
+            following = batch[index + 1] if index + 1 < len(batch) else None
+            # A newer progress tick in the same backlog supersedes this one, except a
+            # 100% tick: with bestvideo+bestaudio the next tick is the following
+            # format's 0%, and clients must still see the first one complete.
+            if progress is not None and progress < 100.0 and following is not None and following[0] is not None:
+                continue
+            try:
+                if progress is None:
+                    store.publish_event(job_id, event)
+                else:
+                    store.update_and_publish(job_id, JobStatus.RUNNING, progress, event)
+            except Exception:
+                logger.warning("Failed to publish progress for job %s", job_id, exc_info=True)
+
+
 @celery_app.task(name="app.tasks.download_media", bind=True)
 def download_media(self, job_id: str, payload_json: str) -> Dict[str, object]:
-    payload: Dict[str, object] = json.loads(payload_json)
+    payload: Dict[str, object] = orjson.loads(payload_json)
     redis_client = _open_redis()
     store = JobStateStore(redis_client)
     storage = get_storage_backend(settings)
-    temp_dir = Path(tempfile.mkdtemp(prefix=f"ytdlnis-{job_id}-"))
+    temp_dir = Path(tempfile.mkdtemp(prefix=f"{STAGING_DIR_PREFIX}{job_id}-", dir=storage.staging_directory()))
+    # Cookies are credentials; keep them in the system temp dir, never on the storage volume.
+    cookie_dir = Path(tempfile.mkdtemp(prefix=f"{STAGING_DIR_PREFIX}{job_id}-cookies-"))
     result: Dict[str, object] | None = None
+    last_published = {"time": 0.0, "progress": -1.0}
+    hook_events: queue.SimpleQueue[HookEvent | None] = queue.SimpleQueue()
+    publisher = threading.Thread(
+        target=_publish_hook_events,
+        args=(hook_events, store, job_id),
+        name=f"ytdlnis-events-{job_id}",
+        daemon=True,
+    )
 
     def progress_hook(data: Dict[str, object]) -> None:
         status = data.get("status")
         if status == "downloading":
             progress = _normalize_progress(data.get("_percent_str"))
-            store.set_status(job_id, JobStatus.RUNNING, progress)
-            store.publish_event(
-                job_id,
-                {
-                    "event": "progress",
-                    "progress": progress,
-                    "downloaded_bytes": data.get("downloaded_bytes"),
-                    "total_bytes": data.get("total_bytes"),
-                    "speed": data.get("speed"),
-                    "eta": data.get("eta"),
-                },
+            now = time.monotonic()
+            if (
+                progress < 100.0
+                and now - last_published["time"] < PROGRESS_MIN_INTERVAL_SECONDS
+                and abs(progress - last_published["progress"]) < PROGRESS_MIN_DELTA
+            ):
+                return
+            last_published["time"] = now
+            last_published["progress"] = progress
+            hook_events.put(
+                (
+                    progress,
+                    {
+                        "event": "progress",
+                        "progress": progress,
+                        "downloaded_bytes": data.get("downloaded_bytes"),
+                        "total_bytes": data.get("total_bytes"),
+                        "speed": data.get("speed"),
+                        "eta": data.get("eta"),
+                    },
+                )
             )
         elif status == "finished":
             filename = data.get("filename")
-            store.publish_event(job_id, {"event": "file_finished", "filename": filename})
+            hook_events.put((None, {"event": "file_finished", "filename": filename}))
 
     try:
-        store.set_status(job_id, JobStatus.RUNNING, 0.0)
-        store.publish_event(job_id, {"event": "started"})
+        store.update_and_publish(job_id, JobStatus.RUNNING, 0.0, {"event": "started"})
 
-        options = _build_ydl_options(temp_dir, payload)
+        options = _build_ydl_options(temp_dir, payload, cookie_dir=cookie_dir)
         options["progress_hooks"].append(progress_hook)
 
         url = payload.get("url")
         if not isinstance(url, str):
             raise ValueError("Missing download URL")
 
-        with YoutubeDL(options) as ydl:
-            info = ydl.extract_info(url, download=True)
+        # The hook only fires inside extract_info, so the publisher lives exactly
+        # that long and every queued tick is flushed before the terminal write.
+        publisher.start()
+        try:
+            with YoutubeDL(options) as ydl:
+                info = ydl.extract_info(url, download=True)
+        finally:
+            hook_events.put(None)
+            publisher.join()
 
         filename = info.get("_filename")
         if not filename:
@@ -155,6 +253,8 @@ def download_media(self, job_id: str, payload_json: str) -> Dict[str, object]:
             "storage_path": str(stored.absolute_path),
         }
         public_result = {k: v for k, v in result.items() if k != "storage_path"}
+        # Validate once here: the status endpoint builds JobResult without validation.
+        JobResult.model_validate(public_result)
         store.set_result(job_id, result)
         store.publish_event(job_id, {"event": "completed", "result": public_result})
         return result
@@ -167,5 +267,6 @@ def download_media(self, job_id: str, payload_json: str) -> Dict[str, object]:
     finally:
         try:
             shutil.rmtree(temp_dir, ignore_errors=True)
+            shutil.rmtree(cookie_dir, ignore_errors=True)
         finally:
             redis_client.close()